@@ -1,10 +1,13 @@
+import asyncio
+import json
 import os
 import tempfile
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import FastAPI, UploadFile, File, HTTPException, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 from dotenv import load_dotenv
@@ -27,22 +30,46 @@ app.add_middleware(
 
 _document_agent = None
 _rag_chain = None
+_agent_lock = asyncio.Lock()
+_chain_lock = asyncio.Lock()
 
 
-def get_agent():
+async def get_agent():
     global _document_agent
-    if _document_agent is None:
-        _document_agent = get_document_agent()
+    async with _agent_lock:
+        if _document_agent is None:
+            _document_agent = await asyncio.to_thread(get_document_agent)
     return _document_agent
 
 
-def get_chain():
+async def get_chain():
     global _rag_chain
-    if _rag_chain is None:
-        _rag_chain = get_rag_chain()
+    async with _chain_lock:
+        if _rag_chain is None:
+            _rag_chain = await asyncio.to_thread(get_rag_chain)
     return _rag_chain
 
 
+@app.on_event("startup")
+async def warm_singletons():
+    """Build the agent and chain at startup so the first request pays
+    no model-loading cost."""
+    await get_agent()
+    chain = await get_chain()
+
+    def warm_models():
+        # Tiny real calls so Ollama loads LLM and embedding weights now,
+        # not on the first user query; keep_alive then holds them resident
+        try:
+            chain._embedding_model.embed_query("warmup")
+            chain._llm.invoke("ok")
+        except Exception as e:
+            print(f"Model warmup skipped: {e}")
+
+    # Fire-and-forget: don't hold up startup on model load
+    asyncio.create_task(asyncio.to_thread(warm_models))
+
+
 class ChatResponse(BaseModel):
     answer: str
     sources: list
@@ -65,6 +92,11 @@ class ImageIngestResponse(BaseModel):
     timestamp: str
 
 
+class BulkIngestResponse(BaseModel):
+    status: str
+    results: list
+
+
 @app.post("/upload", response_model=IngestResponse)
 async def upload_document(
     file: UploadFile = File(..., description="PDF or DOCX file"),
@@ -80,13 +112,21 @@ async def upload_document(
         )
     
     try:
+        # The temp file is required: PyMuPDFLoader/Docx2txtLoader (and the
+        # RapidOCR image parser behind them) only accept filesystem paths,
+        # so ingestion cannot run from an in-memory buffer.
         with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
+            # Stream in bounded chunks instead of buffering the whole file
+            while chunk := await file.read(1 << 20):
+                tmp_file.write(chunk)
             tmp_path = tmp_file.name
-        
-        agent = get_agent()
-        result = agent.ingest_file(tmp_path, original_filename=file.filename)
+
+        agent = await get_agent()
+        # Ingestion does blocking disk reads (PyMuPDF/OCR) and CPU work;
+        # run it off the event loop so concurrent uploads don't serialize
+        result = await asyncio.to_thread(
+            agent.ingest_file, tmp_path, original_filename=file.filename
+        )
         
         os.unlink(tmp_path)
         
@@ -102,6 +142,55 @@ async def upload_document(
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
+@app.post("/upload-bulk", response_model=BulkIngestResponse)
+async def upload_documents_bulk(
+    files: List[UploadFile] = File(..., description="PDF or DOCX files"),
+):
+    """Ingest several documents in one request instead of one POST per file."""
+    allowed_extensions = {".pdf", ".docx"}
+    agent = await get_agent()
+    results = []
+
+    for file in files:
+        file_ext = os.path.splitext(file.filename)[1].lower()
+
+        if file_ext not in allowed_extensions:
+            results.append({
+                "status": "error",
+                "filename": file.filename,
+                "detail": f"Unsupported file type: {file_ext}. Allowed: {allowed_extensions}",
+            })
+            continue
+
+        try:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_file:
+                while chunk := await file.read(1 << 20):
+                    tmp_file.write(chunk)
+                tmp_path = tmp_file.name
+
+            result = await asyncio.to_thread(
+                agent.ingest_file, tmp_path, original_filename=file.filename
+            )
+
+            os.unlink(tmp_path)
+
+            results.append({
+                "status": result["status"],
+                "filename": file.filename,
+                "chunks_created": result["chunks_created"],
+                "images_indexed": result.get("images_indexed", 0),
+                "timestamp": result["timestamp"],
+            })
+        except Exception as e:
+            results.append({
+                "status": "error",
+                "filename": file.filename,
+                "detail": str(e),
+            })
+
+    return BulkIngestResponse(status="success", results=results)
+
+
 @app.post("/upload-image", response_model=ImageIngestResponse)
 async def upload_image(
     file: UploadFile = File(..., description="Image file"),
@@ -117,30 +206,25 @@ async def upload_image(
         )
     
     try:
-        from pathlib import Path
+        from io import BytesIO
+
+        from PIL import Image
         from langchain_core.documents import Document
-        from models.clip_model import get_clip_model
+        from models.clip_batcher import get_clip_batcher
+        from models.clip_model import DEFAULT_IMAGE_LABELS
         from utils.vector_store import get_vector_store
-        
-        img_dir = Path("static/images")
-        img_dir.mkdir(parents=True, exist_ok=True)
-        
-        image_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
-        image_path = img_dir / image_filename
-        
-        content = await file.read()
-        with open(image_path, "wb") as f:
-            f.write(content)
-        
-        clip_model = get_clip_model()
-        candidates = ["chart", "diagram", "table", "screenshot", "photograph", "document page", "plot", "graph", "infographic"]
-        label = clip_model.get_image_label(str(image_path), candidates)
-        embedding = clip_model.get_image_embedding(str(image_path))
+
+        now = datetime.now()
+
+        # Decode straight from the upload buffer; no disk round trip
+        image = Image.open(BytesIO(await file.read())).convert("RGB")
+
+        embedding, label = await get_clip_batcher().submit(image, DEFAULT_IMAGE_LABELS)
         
         if not embedding:
             raise HTTPException(status_code=500, detail="Failed to embed image")
         
-        timestamp = datetime.now().isoformat()
+        timestamp = now.isoformat()
         img_meta = {
             "source": file.filename,
             "filename": file.filename,
@@ -154,13 +238,7 @@ async def upload_image(
         
         vector_store = get_vector_store()
         vector_store.add_image_documents([img_doc], [embedding])
-        
-        # Delete image after embedding
-        try:
-            os.unlink(str(image_path))
-        except:
-            pass
-        
+
         return ImageIngestResponse(
             status="success",
             filename=file.filename,
@@ -179,17 +257,17 @@ async def chat(
 ):
     """Multimodal chat - supports text, image, or text+image queries."""
     try:
-        chain = get_chain()
+        chain = await get_chain()
         
         image_path = None
         if image:
             file_ext = os.path.splitext(image.filename)[1].lower()
             with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_file:
-                content = await image.read()
-                tmp_file.write(content)
+                while chunk := await image.read(1 << 20):
+                    tmp_file.write(chunk)
                 image_path = tmp_file.name
         
-        response = chain.query(question=question, image_query_path=image_path)
+        response = await chain.aquery(question=question, image_query_path=image_path)
         
         if image_path and os.path.exists(image_path):
             os.unlink(image_path)
@@ -205,6 +283,40 @@ async def chat(
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
+@app.post("/chat/stream")
+async def chat_stream(
+    question: Optional[str] = Form(None, description="Your question"),
+    image: Optional[UploadFile] = File(None, description="Optional image for visual search"),
+):
+    """Stream a multimodal chat response as server-sent events."""
+    chain = await get_chain()
+
+    image_path = None
+    if image:
+        file_ext = os.path.splitext(image.filename)[1].lower()
+        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_file:
+            while chunk := await image.read(1 << 20):
+                tmp_file.write(chunk)
+            image_path = tmp_file.name
+
+    def event_stream():
+        try:
+            sources = []
+            for chunk in chain.stream_query(
+                question=question, image_query_path=image_path, sources_out=sources
+            ):
+                yield f"data: {json.dumps({'token': chunk})}\n\n"
+            # Attribution rides the same stream: one final event with the
+            # source dicts, then the terminator the clients key off
+            yield f"data: {json.dumps({'sources': sources})}\n\n"
+            yield "data: [DONE]\n\n"
+        finally:
+            if image_path and os.path.exists(image_path):
+                os.unlink(image_path)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 if __name__ == "__main__":
     import uvicorn
     settings = get_settings()
@@ -1,6 +1,6 @@
 """Chains package for RAG pipeline."""
 
-from chains.retriever import RAGRetriever, RetrievalResult, get_retriever
+from chains.retriever import RAGRetriever, RetrievalBundle, RetrievalResult, get_retriever
 from chains.rag_chain import (
     RAGChain,
     RAGResponse,
@@ -9,6 +9,7 @@ from chains.rag_chain import (
 
 __all__ = [
     "RAGRetriever",
+    "RetrievalBundle",
     "RetrievalResult",
     "get_retriever",
     "RAGChain",
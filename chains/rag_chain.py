@@ -1,14 +1,23 @@
+import asyncio
+import hashlib
+import re
+from functools import lru_cache
 from typing import List, Optional, Generator
+from collections import OrderedDict, deque
 from dataclasses import dataclass
 
-from langchain_core.runnables import RunnablePassthrough, RunnableLambda
+import numpy as np
+
 from langchain_core.output_parsers import StrOutputParser
-from langchain_classic.memory import ConversationSummaryBufferMemory
 
 from chains.retriever import RAGRetriever, get_retriever
+from models.embedding_model import get_embedding_model
 from models.llm import get_ollama_llm
-from prompts.rag_prompts import get_rag_prompt
+from prompts.rag_prompts import RAG_SYSTEM_PROMPT, get_rag_prompt
 from prompts.chat_history_prompt import chat_history_prompt
+from utils.batcher import BatchPrompter
+from utils.heuristic_memory import HeuristicBufferMemory
+from utils.semantic_cache import SemanticQueryCache
 
 
 @dataclass
@@ -22,20 +31,44 @@ class RAGResponse:
 
 
 class RAGChain:
-    
+
+    # Anaphoric cues that suggest a question refers back to earlier turns
+    _FOLLOWUP_PATTERN = re.compile(
+        r"\b(it|that|this|these|those|they|them|he|she|his|her|their"
+        r"|previous|earlier|above|before|again|more)\b",
+        re.IGNORECASE,
+    )
+
     def __init__(self):
         self._retriever = get_retriever()
         self._llm = get_ollama_llm()
         self._prompt = get_rag_prompt()
         
-        self.memory = ConversationSummaryBufferMemory(
-            llm=self._llm._llm,
-            max_token_limit=2000,
+        self.memory = HeuristicBufferMemory(
+            max_tokens=2000,
+            keep_recent=6,
             memory_key="chat_history",
-            return_messages=True,
         )
 
         self._chain = self._build_chain()
+        self._memory_chain = chat_history_prompt() | self._llm._llm | StrOutputParser()
+
+        self._embedding_model = get_embedding_model()
+        self._query_cache = SemanticQueryCache()
+        # Memoized memory-consult verdicts, keyed by (question, history) hash
+        self._memory_check_cache: OrderedDict[str, Optional[str]] = OrderedDict()
+        # Normalized embeddings of recent user turns for the memory gate
+        self._turn_embeddings: deque = deque(maxlen=20)
+        # Micro-batches concurrent async generations into one LLM call
+        self._batch_prompter = BatchPrompter(
+            invoke=self._llm.invoke,
+            single=lambda context, question: self._chain.invoke(
+                {"context": context, "question": question}
+            ),
+            # Same system prompt as the single path, so batched answers
+            # aren't generated under different instructions
+            preamble=RAG_SYSTEM_PROMPT,
+        )
 
         
 
@@ -52,28 +85,120 @@ class RAGChain:
             | self._llm._llm
             | StrOutputParser()
         )
-        
+
+        # Pre-render the template once with sentinel placeholders so the
+        # streaming path can splice context/question into static string
+        # segments instead of re-rendering the full prompt per query
+        rendered = self._prompt.format(context="\x00CTX\x00", question="\x00Q\x00")
+        self._prompt_prefix, rest = rendered.split("\x00CTX\x00")
+        self._prompt_mid, self._prompt_suffix = rest.split("\x00Q\x00")
+
         return chain
 
 
-    def _consult_memory(self, question: str) -> Optional[str]:
+    def _consult_memory(
+        self,
+        question: str,
+        query_embedding: Optional[List[float]] = None,
+    ) -> Optional[str]:
         """
         Check if the question can be answered from memory.
+
+        An embedding-similarity gate over recent turns runs before the
+        LLM call: if the question is not close (cosine >= 0.9) to any of
+        the last 20 user turns, memory cannot answer it and the LLM
+        round trip is skipped.
         """
+        if not question:
+            return None
+
         history = self.memory.load_memory_variables({}).get("chat_history", [])
         if not history:
             return None
-            
-        check_prompt = chat_history_prompt()
-        
-        chain = check_prompt | self._llm._llm | StrOutputParser()
-        response = chain.invoke({"history": history, "question": question})
-        
-        if "NO_MEMORY_CONTEXT" in response:
+
+        # Short keyword queries without an anaphoric cue cannot be
+        # follow-ups; skip the LLM round trip for them.
+        if len(question.split()) <= 3 and not self._FOLLOWUP_PATTERN.search(question):
             return None
-        
-        return response
 
+        # Embedding gate: only consult the LLM when the question is
+        # semantically close to a recent turn
+        if self._turn_embeddings:
+            if query_embedding is None:
+                query_embedding = self._embedding_model.embed_query(question)
+            query_vec = np.asarray(query_embedding, dtype=np.float32)
+            norm = np.linalg.norm(query_vec)
+            if norm > 0:
+                query_vec = query_vec / norm
+                similarities = np.stack(list(self._turn_embeddings)) @ query_vec
+                if float(similarities.max()) < 0.9:
+                    return None
+
+        # Same question against unchanged memory gives the same verdict;
+        # reuse it instead of repeating the LLM call (e.g. client retries).
+        cache_key = hashlib.sha256(
+            f"{question}\x00{history}".encode("utf-8")
+        ).hexdigest()
+        if cache_key in self._memory_check_cache:
+            self._memory_check_cache.move_to_end(cache_key)
+            return self._memory_check_cache[cache_key]
+
+        response = self._memory_chain.invoke({"history": history, "question": question})
+
+        answer = None if "NO_MEMORY_CONTEXT" in response else response
+
+        self._memory_check_cache[cache_key] = answer
+        while len(self._memory_check_cache) > 64:
+            self._memory_check_cache.popitem(last=False)
+
+        return answer
+
+
+    def _check_cache(
+        self,
+        question: str,
+        image_query_path: Optional[str],
+    ) -> tuple:
+        """
+        Check the semantic cache for text-only queries.
+
+        Returns:
+            (cached RAGResponse or None, query embedding or None)
+        """
+        if not question or image_query_path:
+            return None, None
+
+        cached = self._query_cache.get(question)
+        if cached is not None:
+            return cached, None
+
+        query_embedding = self._embedding_model.embed_query(question)
+        return self._query_cache.get(question, query_embedding), query_embedding
+
+    def _remember_turn_embedding(self, embedding: Optional[List[float]]) -> None:
+        """Record a normalized copy of a turn's query embedding."""
+        if embedding is None:
+            return
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            self._turn_embeddings.append(vector / norm)
+
+    def _memory_response(
+        self,
+        question: str,
+        memory_answer: str,
+        query_embedding: Optional[List[float]] = None,
+    ) -> RAGResponse:
+        """Wrap a memory-based answer into a RAGResponse and save it."""
+        self.memory.save_context({"input": question}, {"output": memory_answer})
+        self._remember_turn_embedding(query_embedding)
+
+        return RAGResponse(
+            answer=memory_answer,
+            sources=[{"source": "Conversation Memory"}],
+            query=question,
+        )
 
     def query(
         self,
@@ -82,90 +207,254 @@ class RAGChain:
     ) -> RAGResponse:
         """
         Execute a RAG query and get a response.
-        
+
         Args:
             question: User question
             image_query_path: Optional path to query image for multimodal search
-            
+
         Returns:
             RAGResponse with answer and sources
         """
 
+        # 0. Semantic cache check (text-only queries)
+        cached, query_embedding = self._check_cache(question, image_query_path)
+        if cached is not None:
+            print("Semantic cache hit!")
+            return cached
+
         print("Checking memory...")
-        memory_answer = self._consult_memory(question)
-        
+        memory_answer = self._consult_memory(question, query_embedding)
+
         if memory_answer:
             print("Answer found in memory!")
-            self.memory.save_context({"input": question}, {"output": memory_answer})
-            
-            return RAGResponse(
-                answer=memory_answer,
-                sources=[{"source": "Conversation Memory"}],
-                query=question,
-            )
+            return self._memory_response(question, memory_answer, query_embedding)
 
         print("Retrieving from Vector DB...")
 
         # 1. Retrieve documents (Multimodal if image provided)
         results = self._retriever.retrieve(
             query=question,
-            image_query_path=image_query_path
+            image_query_path=image_query_path,
+            embedding=query_embedding,
         )
-        
-        # 3. Format context
-        context = self._retriever.format_context(results)
-        
-        # 4. Extract sources
-        sources = [result.metadata for result in results]
-        
-        # 5. Generate answer
-        response = self._chain.invoke({
-            "context": context,
-            "question": question
-        })
-        
-         # 6. Save to Memory (WITH SOURCES)
-        source_strings = [s.get('filename', 'Unknown') for s in sources]
-        full_response_to_store = f"{response}\n\nSources: {', '.join(source_strings)}"
-        
+
+        return self._generate(question, results, image_query_path, query_embedding)
+
+    async def aquery(
+        self,
+        question: str,
+        image_query_path: Optional[str] = None,
+    ) -> RAGResponse:
+        """
+        Async variant of query() that overlaps the independent steps.
+
+        The memory-consult LLM call and the retriever's embedding+search
+        have no data dependency until generation, so they run
+        concurrently; latency becomes max(memory, retrieval) + LLM
+        instead of their sum.
+
+        Args:
+            question: User question
+            image_query_path: Optional path to query image for multimodal search
+
+        Returns:
+            RAGResponse with answer and sources
+        """
+        cached, query_embedding = await asyncio.to_thread(
+            self._check_cache, question, image_query_path
+        )
+        if cached is not None:
+            print("Semantic cache hit!")
+            return cached
+
+        print("Checking memory and retrieving concurrently...")
+        memory_task = asyncio.create_task(
+            asyncio.to_thread(self._consult_memory, question, query_embedding)
+        )
+        retrieve_task = asyncio.create_task(
+            self._retriever.aretrieve(
+                query=question,
+                image_query_path=image_query_path,
+                embedding=query_embedding,
+            )
+        )
+
+        memory_answer = await memory_task
+        if memory_answer:
+            print("Answer found in memory!")
+            # Retrieval output is no longer needed; don't wait for it
+            retrieve_task.cancel()
+            return self._memory_response(question, memory_answer, query_embedding)
+
+        results = await retrieve_task
+
+        return await self._agenerate(
+            question, results, image_query_path, query_embedding
+        )
+
+    def _finalize(
+        self,
+        question: str,
+        response: str,
+        bundle,
+        image_query_path: Optional[str],
+        query_embedding: Optional[List[float]],
+        cache: bool = True,
+    ) -> RAGResponse:
+        """Save the answer to memory, cache it, and wrap it up.
+
+        Pass cache=False for answers that should land in memory but not
+        become the cached canonical answer (e.g. truncated streams).
+        """
+        sources = bundle.sources
+
+        # Save to Memory (WITH SOURCES)
+        full_response_to_store = f"{response}\n\nSources: {', '.join(bundle.source_strings)}"
+
         self.memory.save_context({"input": question}, {"output": full_response_to_store})
-        
-        
-        return RAGResponse(
+        self._remember_turn_embedding(query_embedding)
+
+        rag_response = RAGResponse(
             answer=response,
             sources=sources,
             query=question,
         )
+
+        # Cache for future identical / near-identical questions
+        if cache and question and not image_query_path:
+            self._query_cache.put(question, rag_response, query_embedding)
+
+        return rag_response
+
+    def _generate(
+        self,
+        question: str,
+        results: List,
+        image_query_path: Optional[str],
+        query_embedding: Optional[List[float]],
+    ) -> RAGResponse:
+        """
+        Generate an answer from retrieved results and cache it.
+
+        Args:
+            question: User question
+            results: Retrieval results from the retriever
+            image_query_path: Optional query image path (disables caching)
+            query_embedding: Optional precomputed query embedding
+
+        Returns:
+            RAGResponse with answer and sources
+        """
+        bundle = self._retriever.bundle(results)
+
+        response = self._chain.invoke({
+            "context": bundle.context,
+            "question": question
+        })
+
+        return self._finalize(
+            question, response, bundle, image_query_path, query_embedding
+        )
+
+    async def _agenerate(
+        self,
+        question: str,
+        results: List,
+        image_query_path: Optional[str],
+        query_embedding: Optional[List[float]],
+    ) -> RAGResponse:
+        """
+        Async _generate that routes through the batch prompter, so
+        questions in flight at the same time share one LLM call.
+        """
+        bundle = self._retriever.bundle(results)
+
+        response = await self._batch_prompter.submit(bundle.context, question)
+
+        return self._finalize(
+            question, response, bundle, image_query_path, query_embedding
+        )
     
     def stream_query(
         self,
         question: str,
         image_query_path: Optional[str] = None,
+        sources_out: Optional[List[dict]] = None,
     ) -> Generator[str, None, None]:
         """
         Stream a RAG query response.
-        
+
         Args:
             question: User question
             image_query_path: Optional path to query image for multimodal search
-            
+            sources_out: Optional list the retrieved source dicts are
+                appended to once they are known, so callers consuming the
+                token stream can still report attribution
+
         Yields:
             Response chunks
         """
+        if sources_out is None:
+            sources_out = []
+
+        # 0. Semantic cache check (text-only queries)
+        cached, query_embedding = self._check_cache(question, image_query_path)
+        if cached is not None:
+            print("Semantic cache hit!")
+            sources_out.extend(cached.sources)
+            yield cached.answer
+            return
+
+        print("Checking memory...")
+        memory_answer = self._consult_memory(question, query_embedding)
+
+        if memory_answer:
+            print("Answer found in memory!")
+            response = self._memory_response(question, memory_answer, query_embedding)
+            sources_out.extend(response.sources)
+            yield memory_answer
+            return
+
+        print("Retrieving from Vector DB...")
+
         # 1. Retrieve & Format
         results = self._retriever.retrieve(
             query=question,
-            image_query_path=image_query_path
+            image_query_path=image_query_path,
+            embedding=query_embedding,
         )
-        context = self._retriever.format_context(results)
-        
-        prompt_value = self._prompt.format(
-            context=context,
-            question=question,
+        bundle = self._retriever.bundle(results)
+        sources_out.extend(bundle.sources)
+
+        prompt_value = (
+            f"{self._prompt_prefix}{bundle.context}"
+            f"{self._prompt_mid}{question}{self._prompt_suffix}"
         )
-        
-        for chunk in self._llm.stream(prompt_value):
-            yield chunk
+
+        chunks = []
+        completed = False
+        try:
+            for chunk in self._llm.stream(prompt_value):
+                chunks.append(chunk)
+                yield chunk
+            completed = True
+        finally:
+            # Join whatever streamed out and save it exactly as the
+            # blocking path does, so follow-up questions see streamed
+            # turns in memory and repeats hit the semantic cache. Runs
+            # in finally so a client disconnect mid-stream still saves
+            # the partial answer to memory — but only a stream that ran
+            # to completion is cached, or the truncated text would be
+            # served as the canonical answer for the cache TTL.
+            if chunks:
+                self._finalize(
+                    question,
+                    "".join(chunks),
+                    bundle,
+                    image_query_path,
+                    query_embedding,
+                    cache=completed,
+                )
     
     def query_simple(self, question: str) -> str:
         """
@@ -181,5 +470,7 @@ class RAGChain:
         return response.answer
 
 
+@lru_cache()
 def get_rag_chain() -> RAGChain:
+    """Get the cached per-process RAGChain instance."""
     return RAGChain()
@@ -1,5 +1,6 @@
 from typing import List, Optional
 from dataclasses import dataclass
+from functools import lru_cache
 
 from langchain_core.documents import Document
 
@@ -11,16 +12,25 @@ from utils.vector_store import get_vector_store
 class RetrievalResult:
     document: Document
     score: float
-    
+
     @property
     def content(self) -> str:
         return self.document.page_content
-    
+
     @property
     def metadata(self) -> dict:
         return self.document.metadata
 
 
+@dataclass
+class RetrievalBundle:
+    """Everything the chain needs from one retrieval pass."""
+    results: List[RetrievalResult]
+    context: str
+    sources: List[dict]
+    source_strings: List[str]
+
+
 class RAGRetriever:
     def __init__(
         self,
@@ -34,14 +44,16 @@ class RAGRetriever:
         self,
         query: str,
         image_query_path: Optional[str] = None,
+        embedding: Optional[List[float]] = None,
     ) -> List[RetrievalResult]:
         """
         Retrieve documents using Multimodal Fusion or Standard Search.
-        
+
         Args:
             query: User text query
             image_query_path: Optional path to query image
-            
+            embedding: Optional precomputed query embedding
+
         Returns:
             List of top documents with scores
         """
@@ -50,7 +62,8 @@ class RAGRetriever:
             results = self._vector_store.multimodal_search(
                 text_query=query,
                 image_query_path=image_query_path,
-                k=self._top_k
+                k=self._top_k,
+                text_embedding=embedding,
             )
             print(f"Retrieved {len(results)} documents via Multimodal Fusion")
         else:
@@ -58,6 +71,7 @@ class RAGRetriever:
             results = self._vector_store.similarity_search_with_score(
                 query=query,
                 k=self._top_k,
+                embedding=embedding,
             )
             print(f"Retrieved {len(results)} documents via Cosine Similarity")
 
@@ -70,31 +84,94 @@ class RAGRetriever:
             RetrievalResult(document=doc, score=score)
             for doc, score in results
         ]
-    
-    def format_context(self, results: List[RetrievalResult]) -> str:
+
+    async def aretrieve(
+        self,
+        query: str,
+        image_query_path: Optional[str] = None,
+        embedding: Optional[List[float]] = None,
+    ) -> List[RetrievalResult]:
         """
-        Format retrieved results into a context string.
-        
+        Async variant of retrieve.
+
+        Delegates to the vector store's async search methods so the
+        blocking Pinecone round trip happens off the event loop.
+        """
+        if image_query_path:
+            results = await self._vector_store.amultimodal_search(
+                text_query=query,
+                image_query_path=image_query_path,
+                k=self._top_k,
+                text_embedding=embedding,
+            )
+        else:
+            results = await self._vector_store.asimilarity_search_with_score(
+                query=query,
+                k=self._top_k,
+                embedding=embedding,
+            )
+
+        return [
+            RetrievalResult(document=doc, score=score)
+            for doc, score in results
+        ]
+
+
+    def bundle(self, results: List[RetrievalResult]) -> RetrievalBundle:
+        """
+        Build the context string, source dicts, and source names in a
+        single pass over the results.
+
         Args:
             results: List of retrieval results
-            
+
         Returns:
-            Formatted string for LLM prompt
+            RetrievalBundle with context, sources, and source_strings
         """
         if not results:
-            return "No relevant documents found."
-        
+            return RetrievalBundle(results, "No relevant documents found.", [], [])
+
         context_parts = []
+        sources = []
+        source_strings = []
+
         for i, result in enumerate(results, 1):
-            source = result.metadata.get("filename", "Unknown")
-            page_info = f", Page {result.metadata.get('page')}" if "page" in result.metadata else ""
-            
+            metadata = result.metadata
+            filename = metadata.get("filename", "Unknown")
+            page_info = f", Page {metadata.get('page')}" if "page" in metadata else ""
+
             context_parts.append(
-                f"[Source {i}: {source}{page_info}]\n{result.content}"
+                f"[Source {i}: {filename}{page_info}]\n{result.content}"
             )
-        
-        return "\n\n---\n\n".join(context_parts)
+
+            source = {
+                "filename": filename,
+                "type": metadata.get("type", "text"),
+                "score": result.score,
+            }
+            if "page" in metadata:
+                source["page"] = metadata["page"]
+            sources.append(source)
+            source_strings.append(filename)
+
+        return RetrievalBundle(
+            results, "\n\n---\n\n".join(context_parts), sources, source_strings
+        )
+
+    def format_context(self, results: List[RetrievalResult]) -> str:
+        """
+        Format retrieved results into a context string.
+
+        Args:
+            results: List of retrieval results
+
+        Returns:
+            Formatted string for LLM prompt
+        """
+        return self.bundle(results).context
 
 
+@lru_cache()
 def get_retriever() -> RAGRetriever:
+    """Get the cached per-process RAGRetriever instance."""
     return RAGRetriever()
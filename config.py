@@ -15,9 +15,14 @@ class Settings(BaseSettings):
 
     
     # LLM
+    # For concurrent serving, set OLLAMA_NUM_PARALLEL (e.g. 4) and
+    # OLLAMA_MAX_LOADED_MODELS (e.g. 2) in the Ollama server's
+    # environment; by default Ollama serializes requests per model.
     llm_model_name: str = Field(default="kimi-k2-thinking:cloud")
     llm_base_url: str = Field(default="http://localhost:11434")
     llm_temperature: float = Field(default=0.7)
+    # How long Ollama keeps models resident between calls ("-1" = forever)
+    llm_keep_alive: str = Field(default="5m")
 
     
     # Chunking
@@ -1,17 +1,23 @@
-import streamlit as st
-import requests
-from datetime import datetime
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 
-API_BASE_URL = "http://localhost:8000"
+import streamlit as st
 
-st.set_page_config(
-    page_title="VRAG - Vision RAG",
-    page_icon="🔮",
-    layout="wide",
-    initial_sidebar_state="expanded",
+from dashboard_client import (
+    chat_stream,
+    file_digest,
+    upload_document,
+    upload_documents_bulk,
+    upload_image,
 )
 
-st.markdown("""
+# Only the most recent turns are rendered each rerun; older ones sit
+# behind an expander so long chats don't slow every interaction
+MAX_RENDERED_MESSAGES = 20
+
+# Static page chrome; built once at import, re-emitted cheaply per rerun
+PAGE_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -35,51 +41,91 @@ st.markdown("""
         margin-bottom: 1rem;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
 
+st.set_page_config(
+    page_title="VRAG - Vision RAG",
+    page_icon="🔮",
+    layout="wide",
+    initial_sidebar_state="expanded",
+)
 
-def upload_document(file):
-    try:
-        files = {"file": (file.name, file.getvalue(), file.type)}
-        response = requests.post(f"{API_BASE_URL}/upload", files=files)
-        return response.json()
-    except Exception as e:
-        return {"status": "error", "detail": str(e)}
+st.markdown(PAGE_CSS, unsafe_allow_html=True)
 
 
-def upload_image(file):
-    try:
-        files = {"file": (file.name, file.getvalue(), file.type)}
-        response = requests.post(f"{API_BASE_URL}/upload-image", files=files)
-        return response.json()
-    except Exception as e:
-        return {"status": "error", "detail": str(e)}
+if "messages" not in st.session_state:
+    st.session_state.messages = []
 
+# Background pool so long ingests don't freeze the script thread; kept
+# in session_state so reruns reuse it instead of recreating it
+if "pool" not in st.session_state:
+    st.session_state.pool = ThreadPoolExecutor(max_workers=4)
 
-def chat(question: str = None, image_file=None):
-    """Multimodal chat - text, image, or both."""
-    try:
-        data = {}
-        files = {}
-        
-        if question:
-            data["question"] = question
-        
-        if image_file:
-            files["image"] = (image_file.name, image_file.getvalue(), image_file.type)
-        
-        response = requests.post(
-            f"{API_BASE_URL}/chat",
-            data=data if data else None,
-            files=files if files else None
-        )
-        return response.json()
-    except Exception as e:
-        return {"status": "error", "detail": str(e)}
+# Content hashes of documents/images already ingested this session, so
+# repeat uploads skip the POST (and server-side re-embed) entirely.
+# Only successes are recorded: errors stay retryable, unlike the old
+# st.cache_data memoization which pinned them for the session.
+if "ingested_digests" not in st.session_state:
+    st.session_state.ingested_digests = set()
+if "ingested_image_digests" not in st.session_state:
+    st.session_state.ingested_image_digests = set()
 
 
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+def ingest_documents(files, seen_digests: set) -> list:
+    """Worker-thread ingest: one bulk POST, or a single POST for one file.
+
+    seen_digests is the plain set captured from session_state on the
+    script thread; reading and mutating it here needs no script-run
+    context, unlike st.cache_data, so dedup works from the worker.
+    """
+    fresh = []
+    results = []
+    for file in files:
+        digest = file_digest(file)
+        if digest in seen_digests:
+            results.append({"status": "skipped", "filename": file.name})
+        else:
+            fresh.append((file, digest))
+
+    if len(fresh) == 1:
+        outcomes = [upload_document(fresh[0][0])]
+    elif fresh:
+        bulk = upload_documents_bulk([f for f, _ in fresh])
+        outcomes = bulk.get("results", [])
+        if len(outcomes) != len(fresh):
+            # The whole POST failed (backend down, connection error):
+            # there are no per-file results, so fan the top-level error
+            # out to every file instead of silently dropping them
+            detail = bulk.get("detail", "Bulk upload failed")
+            outcomes = [
+                {"status": "error", "filename": f.name, "detail": detail}
+                for f, _ in fresh
+            ]
+    else:
+        outcomes = []
+
+    for (file, digest), result in zip(fresh, outcomes):
+        if result.get("status") == "success":
+            seen_digests.add(digest)
+        results.append(result)
+
+    return results
+
+
+@st.cache_data(show_spinner=False)
+def render_message_body(msg_id: str, mode: str, content: str) -> str:
+    """Pre-formatted body for one chat bubble, cached by message id so
+    reruns skip re-formatting the whole history."""
+    return f"*Mode: {mode}*\n\n{content}"
+
+
+@st.cache_data(show_spinner=False)
+def render_sources(msg_id: str, sources: tuple) -> str:
+    lines = []
+    for i, (filename, source_type) in enumerate(sources, 1):
+        icon = "🖼️" if source_type == "image" else "📄"
+        lines.append(f"{icon} **{i}.** {filename}")
+    return "\n\n".join(lines)
 
 
 st.markdown('<h1 class="main-header">🔮 VRAG - Vision RAG</h1>', unsafe_allow_html=True)
@@ -110,15 +156,34 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.markdown("**📄 Document (PDF/DOCX)**")
-    doc_file = st.file_uploader("Upload document", type=["pdf", "docx"], key="doc_upload", label_visibility="collapsed")
-    
-    if doc_file and st.button("Ingest Document", key="btn_doc"):
-        with st.spinner("Processing..."):
-            result = upload_document(doc_file)
-            if result.get("status") == "success":
-                st.success(f"✅ {result.get('chunks_created')} chunks | {result.get('images_indexed', 0)} images")
+    doc_files = st.file_uploader("Upload documents", type=["pdf", "docx"], key="doc_upload", accept_multiple_files=True, label_visibility="collapsed")
+
+    if doc_files and st.button("Ingest Documents", key="btn_doc"):
+        # Run in the background pool; the UI keeps rerunning while the
+        # upload + server-side CLIP/embedding work proceeds
+        st.session_state.pending_ingest = st.session_state.pool.submit(
+            ingest_documents, doc_files, st.session_state.ingested_digests
+        )
+
+    pending = st.session_state.get("pending_ingest")
+    if pending is not None:
+        with st.status("Ingesting documents…", expanded=True) as status:
+            if pending.done():
+                st.session_state.ingest_results = pending.result()
+                del st.session_state["pending_ingest"]
+                status.update(label="Ingestion complete", state="complete")
             else:
-                st.error(f"❌ {result.get('detail', 'Error')}")
+                time.sleep(0.2)
+                st.rerun()
+
+    for result in st.session_state.pop("ingest_results", []):
+        if result.get("status") == "success":
+            name = result.get("filename", "")
+            st.success(f"✅ {name}: {result.get('chunks_created')} chunks | {result.get('images_indexed', 0)} images")
+        elif result.get("status") == "skipped":
+            st.info(f"⏭️ {result.get('filename', '')}: already ingested this session")
+        else:
+            st.error(f"❌ {result.get('detail', 'Error')}")
 
 with col2:
     st.markdown("**🖼️ Standalone Image**")
@@ -127,12 +192,17 @@ with col2:
     if img_file:
         st.image(img_file, width=100)
         if st.button("Ingest Image", key="btn_img"):
-            with st.spinner("CLIP processing..."):
-                result = upload_image(img_file)
-                if result.get("status") == "success":
-                    st.success(f"✅ Type: {result.get('label')}")
-                else:
-                    st.error(f"❌ {result.get('detail', 'Error')}")
+            digest = file_digest(img_file)
+            if digest in st.session_state.ingested_image_digests:
+                st.info("⏭️ Already ingested this session")
+            else:
+                with st.spinner("CLIP processing..."):
+                    result = upload_image(img_file)
+                    if result.get("status") == "success":
+                        st.session_state.ingested_image_digests.add(digest)
+                        st.success(f"✅ Type: {result.get('label')}")
+                    else:
+                        st.error(f"❌ {result.get('detail', 'Error')}")
 
 
 st.divider()
@@ -190,42 +260,61 @@ if st.button("🔮 Search & Generate", type="primary"):
         # Add user message
         display_content = text_input if text_input else "[Image Query]"
         st.session_state.messages.append({
+            "id": uuid.uuid4().hex,
             "role": "user",
             "content": display_content,
             "mode": mode_label
         })
         
-        with st.spinner("🔮 Processing..."):
-            result = chat(text_input, query_image)
-            
-            if result.get("detail"):
-                response = f"❌ {result['detail']}"
-                sources = []
-            else:
-                response = result.get("answer", "No response")
-                sources = result.get("sources", [])
-            
-            st.session_state.messages.append({
-                "role": "assistant",
-                "content": response,
-                "sources": sources,
-                "mode": mode_label
-            })
-        
+        # Stream tokens as they arrive instead of blocking on the full
+        # answer; sources arrive in the stream's final event and land in
+        # the container chat_stream fills
+        sources = []
+        with st.chat_message("assistant"):
+            st.caption(f"Mode: {mode_label}")
+            try:
+                response = st.write_stream(
+                    chat_stream(text_input, query_image, sources_out=sources)
+                )
+            except Exception as e:
+                response = f"❌ {e}"
+
+        st.session_state.messages.append({
+            "id": uuid.uuid4().hex,
+            "role": "assistant",
+            "content": response,
+            "sources": sources,
+            "mode": mode_label
+        })
+
         st.rerun()
 
-# Display chat messages
+# Display chat messages (only recent ones by default; Streamlit reruns
+# this whole script per interaction, so rendering scales with history)
 st.divider()
-for msg in st.session_state.messages:
+messages = st.session_state.messages
+hidden = len(messages) - MAX_RENDERED_MESSAGES
+if hidden > 0:
+    with st.expander(f"Show {hidden} older messages"):
+        if st.checkbox("Load older messages", key="show_older"):
+            hidden = 0
+
+for idx, msg in enumerate(messages):
+    if idx < hidden:
+        continue
+    msg_id = msg.get("id", str(idx))
     with st.chat_message(msg["role"]):
-        st.caption(f"Mode: {msg.get('mode', 'Unknown')}")
-        st.markdown(msg["content"])
-        
+        st.markdown(render_message_body(msg_id, msg.get("mode", "Unknown"), msg["content"]))
+
         if msg["role"] == "assistant" and msg.get("sources"):
-            with st.expander("📚 Sources"):
-                for i, src in enumerate(msg["sources"], 1):
-                    icon = "🖼️" if src.get("type") == "image" else "📄"
-                    st.markdown(f"{icon} **{i}.** {src.get('filename', 'Unknown')}")
+            # Only the latest answer's sources start expanded; the body
+            # is one cached markdown block instead of a widget per source
+            with st.expander("📚 Sources", expanded=(idx == len(messages) - 1)):
+                sources_key = tuple(
+                    (src.get("filename", "Unknown"), src.get("type", "text"))
+                    for src in msg["sources"]
+                )
+                st.markdown(render_sources(msg_id, sources_key))
 
 
 st.divider()
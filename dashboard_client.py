@@ -0,0 +1,121 @@
+"""
+HTTP client helpers for the Streamlit dashboard.
+
+Kept out of dashboard.py so Streamlit's per-interaction rerun only
+re-executes the page script; this module is imported once per process
+and its function objects (including the cache decorators) are not
+rebuilt on every keystroke.
+"""
+
+import hashlib
+import json
+
+import requests
+import streamlit as st
+from urllib3.util.retry import Retry
+
+API_BASE_URL = "http://localhost:8000"
+
+
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """One keep-alive session per process instead of a TCP handshake per call."""
+    session = requests.Session()
+    # Pool sized for bulk uploads; transient 5xx from the API (e.g. a
+    # restarting backend) retries with backoff instead of erroring the UI
+    retry = Retry(
+        total=3,
+        backoff_factor=0.2,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET", "POST"]),
+    )
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=16, pool_maxsize=32, max_retries=retry
+    )
+    session.mount("http://", adapter)
+    return session
+
+
+def file_digest(file) -> str:
+    """Cheap content hash for cache keys; reads in chunks, no full copy."""
+    file.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(1 << 20), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def upload_document(file):
+    try:
+        # Hand requests the buffer itself; it streams the multipart body
+        # in chunks instead of snapshotting the whole file as bytes
+        file.seek(0)
+        files = {"file": (file.name, file, file.type)}
+        response = get_http_session().post(f"{API_BASE_URL}/upload", files=files)
+        return response.json()
+    except Exception as e:
+        return {"status": "error", "detail": str(e)}
+
+
+def upload_image(file):
+    try:
+        file.seek(0)
+        files = {"file": (file.name, file, file.type)}
+        response = get_http_session().post(f"{API_BASE_URL}/upload-image", files=files)
+        return response.json()
+    except Exception as e:
+        return {"status": "error", "detail": str(e)}
+
+
+def upload_documents_bulk(files) -> dict:
+    """Send all selected documents as repeated parts of one multipart POST."""
+    try:
+        for file in files:
+            file.seek(0)
+        multipart = [("files", (f.name, f, f.type)) for f in files]
+        response = get_http_session().post(f"{API_BASE_URL}/upload-bulk", files=multipart)
+        return response.json()
+    except Exception as e:
+        return {"status": "error", "detail": str(e)}
+
+
+def chat_stream(question: str = None, image_file=None, sources_out: list = None):
+    """Stream chat response tokens from the /chat/stream SSE endpoint.
+
+    Pass a list as ``sources_out`` to receive the source dicts the API
+    sends in its final event; st.write_stream consumes the generator, so
+    a mutable container is the only way to hand them back to the caller.
+    """
+    data = {}
+    files = {}
+
+    if question:
+        data["question"] = question
+
+    if image_file:
+        image_file.seek(0)
+        files["image"] = (image_file.name, image_file, image_file.type)
+
+    with get_http_session().post(
+        f"{API_BASE_URL}/chat/stream",
+        data=data if data else None,
+        files=files if files else None,
+        stream=True,
+    ) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            line = line.decode("utf-8")
+            if not line.startswith("data: "):
+                continue
+            payload = line[len("data: "):]
+            if payload == "[DONE]":
+                break
+            event = json.loads(payload)
+            if "sources" in event:
+                if sources_out is not None:
+                    sources_out.extend(event["sources"])
+                continue
+            yield event.get("token", "")
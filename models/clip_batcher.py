@@ -0,0 +1,145 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple, Union
+from functools import lru_cache
+
+import torch
+from PIL import Image
+
+from models.clip_model import get_clip_model, load_image
+
+ImageSource = Union[str, Image.Image]
+
+
+class CLIPBatcher:
+    """
+    Dynamic micro-batching front end for the CLIP model.
+
+    Concurrent requests submit image paths to an asyncio.Queue; a
+    background task drains up to max_batch_size items (waiting at most
+    max_wait_ms for stragglers), runs one batched CLIP forward pass, and
+    fans results back through per-request futures. One forward over a
+    stacked [B, 3, H, W] tensor replaces B separate passes.
+    """
+
+    def __init__(self, max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000.0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+        # Dedicated executor so CLIP forwards never compete with the
+        # default threadpool Starlette uses for sync endpoints; a single
+        # worker also serializes access to the (non-thread-safe) model.
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="clip-batch"
+        )
+
+    async def submit(
+        self,
+        image: ImageSource,
+        candidates: Optional[List[str]] = None,
+    ) -> Tuple[List[float], Optional[str]]:
+        """
+        Queue an image for batched CLIP processing.
+
+        Args:
+            image: Path to the image file, or an already-decoded PIL image
+            candidates: Optional candidate labels for zero-shot classification
+
+        Returns:
+            (normalized image embedding, best label or None)
+        """
+        loop = asyncio.get_running_loop()
+
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+
+        future: asyncio.Future = loop.create_future()
+        label_set = tuple(candidates) if candidates else None
+        await self._queue.put((image, label_set, loop, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+
+            deadline = asyncio.get_running_loop().time() + self._max_wait
+            while len(batch) < self._max_batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._process, batch
+            )
+
+    def _process(self, batch):
+        """Run one batched forward pass and resolve each request's future."""
+        clip = get_clip_model()
+
+        # Decode per item so one corrupt upload fails only its own
+        # request; the rest of the batch still gets its forward pass
+        decoded = []
+        for entry in batch:
+            source, _, loop, future = entry
+            try:
+                image = source if isinstance(source, Image.Image) else load_image(source)
+            except Exception as e:
+                print(f"Error decoding image for batched CLIP processing: {e}")
+                loop.call_soon_threadsafe(self._set_error, future, e)
+                continue
+            decoded.append((entry, image))
+
+        if not decoded:
+            return
+
+        try:
+            images = [image for _, image in decoded]
+            pixel_values = clip.processor(
+                images=images, return_tensors="pt"
+            ).pixel_values.to(clip.device, clip.dtype)
+
+            with torch.inference_mode():
+                image_features = clip.model.get_image_features(pixel_values=pixel_values)
+            # Upcast to fp32 before normalization to preserve numerics
+            image_features = image_features.float()
+            image_features = image_features / image_features.norm(p=2, dim=-1, keepdim=True)
+
+            # Text features per candidate set come from the wrapper's cache
+            label_sets = {c for (_, c, _, _), _ in decoded if c}
+            text_features = {
+                label_set: clip.get_text_features(label_set)
+                for label_set in label_sets
+            }
+
+            for i, ((path, label_set, loop, future), _) in enumerate(decoded):
+                embedding = image_features[i].tolist()
+                label = None
+                if label_set:
+                    similarities = image_features[i] @ text_features[label_set].T
+                    label = label_set[int(similarities.argmax())]
+                loop.call_soon_threadsafe(self._resolve, future, (embedding, label))
+
+        except Exception as e:
+            print(f"Error in batched CLIP processing: {e}")
+            for (_, _, loop, future), _ in decoded:
+                loop.call_soon_threadsafe(self._set_error, future, e)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result) -> None:
+        if not future.done():
+            future.set_result(result)
+
+    @staticmethod
+    def _set_error(future: asyncio.Future, error: Exception) -> None:
+        if not future.done():
+            future.set_exception(error)
+
+
+@lru_cache()
+def get_clip_batcher() -> CLIPBatcher:
+    return CLIPBatcher()
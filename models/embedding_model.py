@@ -1,4 +1,5 @@
 from typing import List
+from collections import OrderedDict
 from functools import lru_cache
 
 from langchain_ollama import OllamaEmbeddings
@@ -6,44 +7,69 @@ from config import get_settings
 
 
 class EmbeddingModel:
-    
+
     def __init__(
         self,
     ):
         settings = get_settings()
-        
+
         self.model_name = settings.embedding_model_name
         # self.device = "cpu"
-        
+
         self._embeddings = OllamaEmbeddings(
             model=self.model_name,
             base_url=settings.llm_base_url,
+            keep_alive=settings.llm_keep_alive,
         )
+
+        # Exact-match LRU so repeated queries skip the Ollama round trip
+        self._query_cache: OrderedDict[str, List[float]] = OrderedDict()
+        self._query_cache_max = 1024
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """
         Embed a list of documents.
-        
+
+        Pass the full list in one call: tokenization and batching happen
+        server-side in Ollama, so callers should not pre-split texts into
+        small batches (each call pays fixed HTTP overhead).
+
         Args:
             texts: List of document texts to embed
-            
+
         Returns:
             List of embedding vectors
         """
+        if not texts:
+            return []
         return self._embeddings.embed_documents(texts)
     
     def embed_query(self, query: str) -> List[float]:
         """
         Embed a single query.
         Optimized for query embedding (may use different pooling).
-        
+        Exact repeats (modulo case/whitespace) are served from an LRU
+        cache without touching Ollama.
+
         Args:
             query: Query text to embed
-            
+
         Returns:
             Embedding vector
         """
-        return self._embeddings.embed_query(query)
+        key = query.strip().lower()
+        cached = self._query_cache.get(key)
+        if cached is not None:
+            self._query_cache.move_to_end(key)
+            return cached
+
+        embedding = self._embeddings.embed_query(query)
+
+        self._query_cache[key] = embedding
+        if len(self._query_cache) > self._query_cache_max:
+            self._query_cache.popitem(last=False)
+
+        return embedding
     
     def get_langchain_embeddings(self) -> OllamaEmbeddings:
         return self._embeddings
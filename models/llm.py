@@ -6,8 +6,27 @@ from langchain_ollama import ChatOllama
 from config import get_settings
 
 
+@lru_cache(maxsize=8)
+def _cached_chat_ollama(
+    model: str,
+    base_url: str,
+    temperature: float,
+    num_ctx: int,
+    keep_alive: str,
+) -> ChatOllama:
+    """One ChatOllama client per parameter tuple; repeated
+    get_ollama_llm calls with the same tuning reuse it."""
+    return ChatOllama(
+        model=model,
+        base_url=base_url,
+        temperature=temperature,
+        num_ctx=num_ctx,
+        keep_alive=keep_alive,
+    )
+
+
 class OllamaLLM:
-    
+
     def __init__(
         self,
         model_name: Optional[str] = None,
@@ -16,17 +35,18 @@ class OllamaLLM:
         num_ctx: Optional[int] = None,
     ):
         settings = get_settings()
-        
+
         self.model_name = model_name or settings.llm_model_name
         self.base_url = base_url or settings.llm_base_url
         self.temperature = temperature if temperature is not None else settings.llm_temperature
         self.num_ctx = num_ctx or 4096
-        
-        self._llm = ChatOllama(
-            model=self.model_name,
-            base_url=self.base_url,
-            temperature=self.temperature,
-            num_ctx=self.num_ctx,
+
+        self._llm = _cached_chat_ollama(
+            self.model_name,
+            self.base_url,
+            self.temperature,
+            self.num_ctx,
+            settings.llm_keep_alive,
         )
     
     def invoke(self, prompt: str) -> str:
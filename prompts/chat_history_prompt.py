@@ -1,7 +1,9 @@
+from functools import lru_cache
+
 from langchain_core.prompts import PromptTemplate
 
 
-CHAT_HISTORY_PROMPT = PromptTemplate.from_template(
+_CHAT_HISTORY_TEMPLATE = (
             """Given the following conversation history, can you answer the user's question?
             If yes, provide the answer AND the original sources mentioned in previous turns.
             If the history does not contain enough information to answer partially or fully, reply exactly "NO_MEMORY_CONTEXT".
@@ -15,5 +17,6 @@ CHAT_HISTORY_PROMPT = PromptTemplate.from_template(
 )
 
 
+@lru_cache(maxsize=None)
 def chat_history_prompt() -> PromptTemplate:
-    return CHAT_HISTORY_PROMPT
\ No newline at end of file
+    return PromptTemplate.from_template(_CHAT_HISTORY_TEMPLATE)
\ No newline at end of file
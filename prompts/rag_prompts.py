@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from langchain_core.prompts import ChatPromptTemplate
 
 
@@ -58,12 +60,19 @@ RAG_HUMAN_PROMPT = """## Retrieved Context (Text + Visual):
 Provide a comprehensive answer by synthesizing information from both textual and visual sources in the context above. Clearly cite your sources."""
 
 
-RAG_PROMPT = ChatPromptTemplate.from_messages([
+# Plain tuple of message specs; the template itself is parsed lazily so
+# workers that never query skip LangChain's message parsing at import.
+# Keep the static system prompt first and all dynamic fields (context,
+# question) last: Ollama reuses the KV cache for a shared prompt prefix
+# across calls, so the large preamble is only ever prefilled once per
+# model load.
+_RAG_MESSAGES = (
     ("system", RAG_SYSTEM_PROMPT),
     ("human", RAG_HUMAN_PROMPT),
-])
+)
 
 
+@lru_cache(maxsize=None)
 def get_rag_prompt() -> ChatPromptTemplate:
     """Get the RAG (Retrieval Augmented Generation) prompt template."""
-    return RAG_PROMPT
+    return ChatPromptTemplate.from_messages(list(_RAG_MESSAGES))
@@ -1,125 +1,232 @@
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 
 from langchain_core.documents import Document
 from langchain_community.document_loaders import Docx2txtLoader
 from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_community.document_loaders.parsers import RapidOCRBlobParser
-import fitz 
-from PIL import Image
+
+log = logging.getLogger(__name__)
 
 
 class MetaDATAExtractor():
-  
+
+    # Empty so subclasses can declare their own slots without
+    # re-growing a per-instance __dict__
+    __slots__ = ()
+
     def _create_metadata(self, filename: str) -> dict:
         """
         Create standard metadata with filename and timestamp.
-        
+
+        The timestamp is frozen once per loader instance (set in the
+        subclass __init__), so every page of a document carries the
+        same ingestion time and no per-call clock/zone lookups happen.
+
         Args:
             filename: Name of the source file
-            
+
         Returns:
             Metadata dictionary
         """
         return {
             "filename": filename,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": self._timestamp,
         }
 
 
 
 class PDFLoader(MetaDATAExtractor):
-    
+
+    __slots__ = ("file_path", "filename", "img_dir", "_timestamp")
+
+    # Floors for extracted images: anything smaller is decorative
+    # (bullets, rules, glyphs) and not worth a CLIP embedding
+    MIN_IMAGE_DIM = 32
+    MIN_IMAGE_BYTES = 4096
+
     def __init__(self, file_path: str):
         self.file_path = file_path
         self.filename = Path(file_path).name
         self.img_dir = Path("static/images")
         self.img_dir.mkdir(parents=True, exist_ok=True)
+        # UTC avoids a local-zone lookup per call and sorts cleanly
+        self._timestamp = datetime.now(timezone.utc).isoformat()
     
     def _extract_images(self) -> dict:
         """
         Extract images from PDF and save to disk.
-        
+
+        Extraction walks the document serially (fitz documents are not
+        safe for concurrent access), but the disk writes release the
+        GIL and run on a thread pool so the loop isn't blocked on each
+        file.
+
         Returns:
             Dictionary mapping page_index (0-based) to list of image paths.
         """
+        # Imported here so loading a DOCX never pays the fitz
+        # shared-library import on a cold start
+        import fitz
+
         images_map = {}
+        pending_writes = []  # (path, bytes) pairs flushed after the scan
         doc = fitz.open(self.file_path)
-        
+
         for page_index, page in enumerate(doc):
             image_list = page.get_images(full=True)
             page_images = []
-            
+
             for img_index, img in enumerate(image_list):
                 try:
                     xref = img[0]
                     base_image = doc.extract_image(xref)
                     image_bytes = base_image["image"]
                     image_ext = base_image["ext"]
-                    
+
+                    # Bullets, rules, and signature glyphs are noise
+                    # for CLIP and bloat the embedding step; skip
+                    # anything below the size floors
+                    if (
+                        base_image.get("width", 0) < self.MIN_IMAGE_DIM
+                        or base_image.get("height", 0) < self.MIN_IMAGE_DIM
+                        or len(image_bytes) < self.MIN_IMAGE_BYTES
+                    ):
+                        continue
+
                     image_filename = f"{self.filename}_p{page_index+1}_i{img_index+1}.{image_ext}"
-                    image_path = self.img_dir / image_filename
-                    
-                    with open(image_path, "wb") as f:
-                        f.write(image_bytes)
-                    
-                    page_images.append(str(image_path))
+                    image_path = str(self.img_dir / image_filename)
+
+                    pending_writes.append((image_path, image_bytes))
+                    page_images.append(image_path)
                 except Exception as e:
-                    print(f"Error extracting image {img_index} on page {page_index}: {e}")
-            
+                    log.warning("Error extracting image %s on page %s: %s", img_index, page_index, e)
+
             if page_images:
                 images_map[page_index] = page_images
-                
+
+        failed = set()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = {
+                pool.submit(self._write_image, path, data): path
+                for path, data in pending_writes
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    log.warning("Error writing image %s: %s", path, e)
+                    failed.add(path)
+
+        if failed:
+            images_map = {
+                page: [p for p in paths if p not in failed]
+                for page, paths in images_map.items()
+            }
+            images_map = {page: paths for page, paths in images_map.items() if paths}
+
         return images_map
 
+    @staticmethod
+    def _write_image(path: str, data: bytes) -> None:
+        # Raw fd write: skips the buffered-IO layer, which for a
+        # single already-materialized bytes blob only adds a copy
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    # Pages averaging at least this many extractable characters are
+    # treated as digital-native; below it the PDF is likely scanned
+    OCR_CHARS_PER_PAGE = 200
+    OCR_SAMPLE_PAGES = 5
+
+    def _needs_ocr(self) -> bool:
+        """
+        Decide whether the PDF needs OCR by sampling text density.
+
+        Digital-native PDFs already expose their text through fitz, so
+        running RapidOCR over every embedded image is pure overhead.
+        Sample the first few pages and only enable OCR when the average
+        extractable text per page falls below the threshold.
+        """
+        import fitz
+
+        try:
+            doc = fitz.open(self.file_path)
+            sample = min(len(doc), self.OCR_SAMPLE_PAGES)
+            if sample == 0:
+                return False
+            chars = sum(len(doc[i].get_text()) for i in range(sample))
+            return (chars / sample) < self.OCR_CHARS_PER_PAGE
+        except Exception as e:
+            log.warning("Error sampling text density, defaulting to OCR: %s", e)
+            return True
+
     def load(self) -> list[Document]:
         """
         Load PDF with text, images, and OCR using LangChain's PyMuPDFLoader.
-        Also manually extracts and saves images to disk for multimodal usage.
-        
+        OCR only runs when the text-density heuristic says the PDF looks
+        scanned. Also manually extracts and saves images to disk for
+        multimodal usage.
+
         Returns:
             List of Documents (one per page)
         """
+        ocr_used = self._needs_ocr()
         loader = PyMuPDFLoader(
             self.file_path,
             mode="page",
             images_inner_format="markdown-img",
-            images_parser=RapidOCRBlobParser(),
+            images_parser=RapidOCRBlobParser() if ocr_used else None,
         )
-        documents = loader.load()
-        
-        images_by_page = self._extract_images()
-        
-        metadata = self._create_metadata(self.filename)
+
+        # The text/OCR parse and the image extraction are independent
+        # walks over the same file, and each opens its own fitz
+        # document, so they can overlap: extraction runs on a worker
+        # thread while the (possibly OCR-heavy) parse runs here.
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            images_future = pool.submit(self._extract_images)
+            documents = loader.load()
+            images_by_page = images_future.result()
+
+        base_metadata = self._create_metadata(self.filename)
         for doc in documents:
-            existing_meta = doc.metadata
-            
-            page_idx = existing_meta.get("page", 0) 
-            
-            final_metadata = {
-                **metadata,
-                **existing_meta,
-            }
-            
+            # Mutate the loader-supplied dict in place instead of
+            # rebuilding a merged copy per page; existing keys still win
+            # over the base metadata, as the old {**base, **existing}
+            # merge behaved
+            meta = doc.metadata
+
+            page_idx = meta.get("page", 0)
+
+            for key, value in base_metadata.items():
+                meta.setdefault(key, value)
+            meta["ocr_used"] = ocr_used
+
             if page_idx in images_by_page:
-                final_metadata["image_paths"] = images_by_page[page_idx]
-            
-            if "page" in existing_meta:
-                 final_metadata["page"] = existing_meta["page"] + 1
-            
-            doc.metadata = final_metadata
-            doc.page_content = doc.page_content 
-        
+                meta["image_paths"] = images_by_page[page_idx]
+
+            if "page" in meta:
+                meta["page"] = meta["page"] + 1
+
         return documents
 
 
 class DOCXLoader(MetaDATAExtractor):
-    
+
+    __slots__ = ("file_path", "filename", "_timestamp")
+
     def __init__(self, file_path: str):
         self.file_path = file_path
         self.filename = Path(file_path).name
+        self._timestamp = datetime.now(timezone.utc).isoformat()
     
     def load(self) -> list[Document]:
         """
@@ -128,9 +235,7 @@ class DOCXLoader(MetaDATAExtractor):
         Returns:
             List of Document objects
         """
-        print("loading document")
         loader = Docx2txtLoader(self.file_path)
-        print("document laoded")
         documents = loader.load()
         
         # Update metadata
@@ -145,51 +250,49 @@ class DOCXLoader(MetaDATAExtractor):
 
 
 class DocumentLoaderFactory:
-    
-    SUPPORTED_EXTENSIONS = {".pdf", ".docx"}
-    
+
+    # Single source of truth for dispatch; SUPPORTED_EXTENSIONS is
+    # derived from it so the two can never drift apart
+    _LOADERS = {
+        ".pdf": PDFLoader,
+        ".docx": DOCXLoader,
+    }
+    SUPPORTED_EXTENSIONS = frozenset(_LOADERS)
+
     @classmethod
     def get_loader(cls, source: str):
         """
         Get appropriate loader for the source.
-        
+
         Args:
             source: File path or URL
-            
+
         Returns:
             Appropriate document loader
-            
+
         Raises:
             ValueError: If source type is not supported
         """
+        extension = Path(source).suffix.lower()
 
-        
-        path = Path(source)
-        extension = path.suffix.lower()
-        
-        if extension == ".pdf":
-            return PDFLoader(source)
-        elif extension == ".docx":
-            return DOCXLoader(source)
-        else:
+        loader_cls = cls._LOADERS.get(extension)
+        if loader_cls is None:
             raise ValueError(
                 f"Unsupported file type: {extension}. "
-                f"Supported types: {cls.SUPPORTED_EXTENSIONS}"
+                f"Supported types: {set(cls.SUPPORTED_EXTENSIONS)}"
             )
-    
+        return loader_cls(source)
+
     @classmethod
     def is_supported(cls, source: str) -> bool:
         """
         Check if a source is supported.
-        
+
         Args:
             source: File path or URL
-            
+
         Returns:
             True if supported, False otherwise
         """
-
-        
-        extension = Path(source).suffix.lower()
-        return extension in cls.SUPPORTED_EXTENSIONS
+        return Path(source).suffix.lower() in cls._LOADERS
 
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Optional
 from datetime import datetime
 
@@ -5,6 +6,18 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
 
+@lru_cache(maxsize=32)
+def _get_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Share one splitter per (chunk_size, chunk_overlap): the splitter
+    is stateless across calls and rebuilding it per TextChunker repeats
+    the separator setup for identical configuration."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+    )
+
+
 class TextChunker:
     def __init__(
         self,
@@ -12,11 +25,7 @@ class TextChunker:
         chunk_overlap: int = 200,
     ):
 
-        self._splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-        )
+        self._splitter = _get_splitter(chunk_size, chunk_overlap)
     
     def chunk(
         self,
@@ -35,14 +44,20 @@ class TextChunker:
             List of LangChain Document objects with chunked content
         """
         base_metadata = metadata or {}
-        doc = Document(page_content=text, metadata=base_metadata)
-        chunks = self._splitter.split_documents([doc])
-        
-        for i, chunk in enumerate(chunks):
-            chunk.metadata["chunk_index"] = i
-            chunk.metadata["total_chunks"] = len(chunks)
-        
-        return chunks
+
+        # split_text avoids split_documents' wrapper Document and the
+        # metadata deepcopy LangChain performs per chunk; the Documents
+        # are built once here with their final metadata
+        texts = self._splitter.split_text(text)
+        total = len(texts)
+
+        return [
+            Document(
+                page_content=chunk_text,
+                metadata={**base_metadata, "chunk_index": i, "total_chunks": total},
+            )
+            for i, chunk_text in enumerate(texts)
+        ]
     
     def chunk_with_context(
         self,
@@ -63,32 +78,27 @@ class TextChunker:
             List of Document objects with context-enhanced content
         """
         chunks = self.chunk(text, metadata)
-        
+
         if len(chunks) <= 1:
             return chunks
-        
-        enhanced_chunks = []
-        
+
+        # Neighbor context is read from the original contents before any
+        # chunk is rewritten, then each Document is mutated in place:
+        # one join per chunk instead of stacked f-string intermediates,
+        # and no fresh Document or metadata dict per chunk
+        originals = [chunk.page_content for chunk in chunks]
+        last = len(chunks) - 1
+
         for i, chunk in enumerate(chunks):
-            content = chunk.page_content
-            
-            # Add context from previous chunk
+            parts = []
             if i > 0:
-                prev_content = chunks[i - 1].page_content
-                prev_context = prev_content[-context_window:]
-                content = f"[Previous context: ...{prev_context}]\n\n{content}"
-            
-            # Add context from next chunk
-            if i < len(chunks) - 1:
-                next_content = chunks[i + 1].page_content
-                next_context = next_content[:context_window]
-                content = f"{content}\n\n[Next context: {next_context}...]"
-            
-            enhanced_chunk = Document(
-                page_content=content,
-                metadata={**chunk.metadata, "has_context": True}
-            )
-            enhanced_chunks.append(enhanced_chunk)
-        
-        return enhanced_chunks
+                parts.append(f"[Previous context: ...{originals[i - 1][-context_window:]}]\n\n")
+            parts.append(originals[i])
+            if i < last:
+                parts.append(f"\n\n[Next context: {originals[i + 1][:context_window]}...]")
+
+            chunk.page_content = "".join(parts)
+            chunk.metadata["has_context"] = True
+
+        return chunks
 
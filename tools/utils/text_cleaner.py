@@ -6,36 +6,63 @@ class TextCleaner:
     def __init__(self, remove_special_chars: bool = False):
         self.remove_special_chars = remove_special_chars
         self._whitespace_pattern = re.compile(r'\s+')
+        self._hspace_pattern = re.compile(r'[^\S\n]+')
+        self._newline_trim_pattern = re.compile(r' *\n *')
         self._special_chars_pattern = re.compile(r'[^\w\s.,!?;:\'"()-]')
         self._multiple_newlines_pattern = re.compile(r'\n{3,}')
+        # No .* inside the alternation: the line tail is consumed once
+        # by the outer .*$ instead of two stacked greedy quantifiers,
+        # which keeps the scan linear on non-matching text
         self._header_footer_pattern = re.compile(
-            r'^(page\s*\d+|©.*|all rights reserved.*|\d+\s*of\s*\d+).*$',
+            r'^(page\s*\d+|©|all rights reserved|\d+\s*of\s*\d+).*$',
             re.MULTILINE | re.IGNORECASE
         )
+        self._sentence_pattern = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
 
     def clean(self, text: str) -> str:
         if not text:
             return ""
-        
+
+        # Already-normalized text (the common case for digital-native
+        # PDFs) skips the regex passes entirely; the `in` checks are
+        # C-level scans, far cheaper than running the state machines
+        # isascii() rules out the non-ASCII \s-class codepoints the
+        # regexes collapse (\xa0, \x85, em/en spaces, line/paragraph
+        # separators, ideographic space, ...) without enumerating them;
+        # it's a C-level scan like the membership checks
+        if (
+            not self.remove_special_chars
+            and text.isascii()
+            and "  " not in text
+            and "\t" not in text
+            and "\r" not in text
+            and "\v" not in text
+            and "\f" not in text
+            and " \n" not in text
+            and "\n " not in text
+            and "\n\n\n" not in text
+            and text == text.strip()
+        ):
+            return text
+
         if self.remove_special_chars:
             text = self._special_chars_pattern.sub(' ', text)
-        
+
         text = self.normalize_whitespace(text)
         return text.strip()
     
     def normalize_whitespace(self, text: str) -> str:
+        # Three substitutions over the whole string instead of a
+        # split/per-line-sub/strip/join cycle that materializes a list
+        # and re-copies every line: collapse blank runs, collapse
+        # horizontal whitespace, then trim space around newlines
         text = self._multiple_newlines_pattern.sub('\n\n', text)
-        lines = text.split('\n')
-        normalized_lines = []
-        for line in lines:
-            normalized_line = self._whitespace_pattern.sub(' ', line).strip()
-            normalized_lines.append(normalized_line)
-        return '\n'.join(normalized_lines)
+        text = self._hspace_pattern.sub(' ', text)
+        return self._newline_trim_pattern.sub('\n', text).strip(' ')
     
     def remove_headers_footers(self, text: str) -> str:
         return self._header_footer_pattern.sub('', text)
     
     def extract_sentences(self, text: str) -> list[str]:
-        sentence_pattern = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
-        sentences = sentence_pattern.split(text)
+        sentences = self._sentence_pattern.split(text)
         return [s.strip() for s in sentences if s.strip()]
@@ -0,0 +1,138 @@
+import asyncio
+import re
+from typing import Callable, Dict, List, Optional
+
+
+class BatchPrompter:
+    """
+    Micro-batches concurrent questions into a single LLM prompt.
+
+    Requests await a future while a background task drains up to
+    max_batch_size (context, question) pairs within a max_wait_ms
+    window, builds one numbered prompt carrying each question's own
+    retrieved context, invokes the LLM once, and splits the reply on
+    'A<k>:' markers. Single-item batches (the idle-traffic common case)
+    and unparseable replies fall back to per-question invocation.
+    """
+
+    _HEADER = (
+        "Answer each of the following questions independently, using only the "
+        "context supplied for that question. Reply with one answer per "
+        "question, each starting on a new line with its marker 'A1:', 'A2:', "
+        "... and nothing before the first marker."
+    )
+    _ANSWER_PATTERN = re.compile(r"(?:^|\n)\s*A(\d+):", re.MULTILINE)
+
+    def __init__(
+        self,
+        invoke: Callable[[str], str],
+        single: Callable[[str, str], str],
+        preamble: str = "",
+        max_batch_size: int = 8,
+        max_wait_ms: float = 25.0,
+    ):
+        self._invoke = invoke
+        self._single = single
+        # Static instructions shared with the single-question path, kept
+        # ahead of all dynamic content so batched answers follow the
+        # same system prompt and the prompt prefix stays KV-cacheable
+        self._preamble = preamble
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000.0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, context: str, question: str) -> str:
+        """
+        Queue a question for batched generation.
+
+        Args:
+            context: Retrieved context for this question
+            question: User question
+
+        Returns:
+            The answer text for this question
+        """
+        loop = asyncio.get_running_loop()
+
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+
+        future: asyncio.Future = loop.create_future()
+        await self._queue.put((context, question, loop, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+
+            deadline = asyncio.get_running_loop().time() + self._max_wait
+            while len(batch) < self._max_batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await asyncio.to_thread(self._process, batch)
+
+    def _process(self, batch):
+        """Answer a drained batch with one LLM call where possible."""
+        if len(batch) == 1:
+            context, question, loop, future = batch[0]
+            self._answer_singly([(context, question, loop, future)])
+            return
+
+        try:
+            parts = [self._preamble, self._HEADER] if self._preamble else [self._HEADER]
+            for i, (context, question, _, _) in enumerate(batch, 1):
+                parts.append(f"\n## Context for question {i}:\n{context}")
+                parts.append(f"Q{i}: {question}")
+            output = self._invoke("\n".join(parts))
+
+            answers = self._split_answers(output, len(batch))
+            if answers is None:
+                # Markers missing or incomplete; re-answer individually
+                self._answer_singly(batch)
+                return
+
+            for i, (_, _, loop, future) in enumerate(batch, 1):
+                loop.call_soon_threadsafe(self._resolve, future, answers[i])
+
+        except Exception as e:
+            for _, _, loop, future in batch:
+                loop.call_soon_threadsafe(self._set_error, future, e)
+
+    def _answer_singly(self, batch):
+        for context, question, loop, future in batch:
+            try:
+                answer = self._single(context, question)
+                loop.call_soon_threadsafe(self._resolve, future, answer)
+            except Exception as e:
+                loop.call_soon_threadsafe(self._set_error, future, e)
+
+    @classmethod
+    def _split_answers(cls, output: str, count: int) -> Optional[Dict[int, str]]:
+        """Split a combined reply into per-question answers, or None."""
+        pieces: List[str] = cls._ANSWER_PATTERN.split(output)
+        answers: Dict[int, str] = {}
+
+        # pieces = [prefix, idx1, text1, idx2, text2, ...]
+        for idx_str, text in zip(pieces[1::2], pieces[2::2]):
+            answers[int(idx_str)] = text.strip()
+
+        if set(answers) != set(range(1, count + 1)):
+            return None
+        return answers
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result: str) -> None:
+        if not future.done():
+            future.set_result(result)
+
+    @staticmethod
+    def _set_error(future: asyncio.Future, error: Exception) -> None:
+        if not future.done():
+            future.set_exception(error)
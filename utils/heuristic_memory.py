@@ -0,0 +1,109 @@
+import re
+from typing import Dict, List, Tuple
+
+
+class HeuristicBufferMemory:
+    """
+    Conversation memory that summarizes without an LLM call.
+
+    Drop-in replacement for ConversationSummaryBufferMemory's
+    save_context/load_memory_variables surface. Token counts are
+    estimated as len(text) // 4 and cached per message; when the buffer
+    passes 80% of max_tokens, the oldest messages are folded into a
+    deterministic bullet summary of extracted entities, numbers, and
+    decision sentences, while the most recent keep_recent messages stay
+    verbatim. Overflow turns therefore cost regex work instead of an
+    extra LLM round trip.
+    """
+
+    _SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+    _DECISION_PATTERN = re.compile(
+        r"\b(decided|decide|chose|choose|selected|agreed|will|must|should)\b",
+        re.IGNORECASE,
+    )
+    _ENTITY_PATTERN = re.compile(r"\b[A-Z][\w-]+(?:\s+[A-Z][\w-]+)*\b")
+    _NUMBER_PATTERN = re.compile(r"\b\d+(?:[.,]\d+)?%?\b")
+
+    def __init__(
+        self,
+        max_tokens: int = 2000,
+        keep_recent: int = 6,
+        memory_key: str = "chat_history",
+    ):
+        self.max_tokens = max_tokens
+        self.keep_recent = keep_recent
+        self.memory_key = memory_key
+
+        self._summary_lines: List[str] = []
+        # (role, text, estimated tokens)
+        self._messages: List[Tuple[str, str, int]] = []
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        return len(text) // 4
+
+    def save_context(self, inputs: Dict, outputs: Dict) -> None:
+        """Append a (Human, AI) turn and compress if over budget."""
+        for role, text in (
+            ("Human", inputs.get("input") or ""),
+            ("AI", outputs.get("output") or ""),
+        ):
+            if text:
+                self._messages.append((role, text, self._estimate_tokens(text)))
+
+        self._maybe_compress()
+
+    def load_memory_variables(self, inputs: Dict) -> Dict:
+        history: List[str] = []
+        if self._summary_lines:
+            history.append(
+                "Summary of earlier conversation:\n" + "\n".join(self._summary_lines)
+            )
+        history.extend(f"{role}: {text}" for role, text, _ in self._messages)
+        return {self.memory_key: history}
+
+    def clear(self) -> None:
+        self._summary_lines = []
+        self._messages = []
+
+    def _maybe_compress(self) -> None:
+        budget = int(self.max_tokens * 0.8)
+        total = sum(tokens for _, _, tokens in self._messages)
+        if total <= budget:
+            return
+
+        while len(self._messages) > self.keep_recent and total > budget:
+            role, text, tokens = self._messages.pop(0)
+            line = self._summarize_message(role, text)
+            if line:
+                self._summary_lines.append(line)
+            total -= tokens
+
+    def _summarize_message(self, role: str, text: str) -> str:
+        """Build one deterministic summary bullet for a message."""
+        parts: List[str] = []
+
+        decision = next(
+            (
+                sentence.strip()
+                for sentence in self._SENTENCE_PATTERN.split(text)
+                if self._DECISION_PATTERN.search(sentence)
+            ),
+            None,
+        )
+        if decision:
+            parts.append(decision)
+
+        entities = list(dict.fromkeys(self._ENTITY_PATTERN.findall(text)))[:5]
+        if entities:
+            parts.append(f"mentioned: {', '.join(entities)}")
+
+        numbers = list(dict.fromkeys(self._NUMBER_PATTERN.findall(text)))[:5]
+        if numbers:
+            parts.append(f"figures: {', '.join(numbers)}")
+
+        if not parts:
+            # Fall back to a truncated excerpt so the turn isn't lost
+            parts.append(text[:120].strip())
+
+        return f"- {role}: " + "; ".join(parts)
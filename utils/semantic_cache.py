@@ -0,0 +1,180 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.text_norm import canonicalize
+
+
+class SemanticQueryCache:
+    """
+    LRU+TTL cache of responses keyed by query.
+
+    Exact hits use a SHA-256 key over the query text; fuzzy hits use
+    cosine similarity between the query embedding and the embeddings of
+    recently cached queries. Embeddings are L2-normalized once at
+    insert time and stored as int8 rows (symmetric per-row scaling) in
+    one contiguous matrix, so a lookup is a single integer matmul plus
+    argmax at a quarter of the float32 memory traffic. Quantization
+    costs about 1e-2 of cosine precision, which is well inside the gap
+    between typical paraphrase scores and the match thresholds here.
+
+    Entries expire ttl_seconds after insert (checked lazily on access),
+    and inserts that are near-duplicates of an existing entry
+    (cosine >= dedup_threshold) overwrite that entry instead of growing
+    the matrix.
+
+    At the default max_size (128) a brute-force scan beats an ANN
+    index: one int8 einsum over 128 rows is sub-microsecond work, while
+    HNSW adds graph maintenance on every insert/evict. If max_size is
+    ever raised past ~10k entries, swap the matrix for a
+    faiss.IndexHNSWFlat over the same normalized rows.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 128,
+        similarity_threshold: float = 0.97,
+        ttl_seconds: float = 3600.0,
+        dedup_threshold: float = 0.98,
+    ):
+        self._max_size = max_size
+        self._threshold = similarity_threshold
+        self._ttl = ttl_seconds
+        self._dedup_threshold = dedup_threshold
+        self._responses: OrderedDict[str, Any] = OrderedDict()
+        self._expires: Dict[str, float] = {}
+        # Row i of _matrix is the int8-quantized normalized embedding
+        # for _keys[i]; _scales[i] maps it back to float units
+        self._keys: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        # get() runs on worker threads (aquery offloads the cache check
+        # via asyncio.to_thread) while put() runs on the event-loop
+        # thread; the lock keeps _keys/_matrix/_scales row bookkeeping
+        # consistent across the two
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(question: str) -> str:
+        # Canonicalize so filler ("hi, can you ... please") doesn't
+        # split otherwise-identical queries across keys
+        return hashlib.sha256(canonicalize(question).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) + 1e-9)
+
+    @staticmethod
+    def _quantize(vector: np.ndarray) -> tuple:
+        """Quantize a normalized vector to (int8 row, float scale)."""
+        scale = float(np.abs(vector).max()) / 127.0 + 1e-12
+        quantized = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+        return quantized, scale
+
+    def _scores(self, embedding: List[float]) -> np.ndarray:
+        """Cosine scores of a query against all cached rows."""
+        query, query_scale = self._quantize(self._normalize(embedding))
+        # int32 accumulation avoids int8 overflow; per-row scales map
+        # the integer dot products back to cosine units
+        dots = np.einsum("ij,j->i", self._matrix, query, dtype=np.int32)
+        return dots * (self._scales * query_scale)
+
+    def get(
+        self,
+        question: str,
+        embedding: Optional[List[float]] = None,
+    ) -> Optional[Any]:
+        """
+        Look up a cached response, exact match first, then fuzzy.
+
+        Args:
+            question: User question
+            embedding: Optional query embedding for fuzzy matching
+
+        Returns:
+            Cached response, or None on miss
+        """
+        with self._lock:
+            key = self.make_key(question)
+            if key in self._responses:
+                if self._expired(key):
+                    self._evict(key)
+                else:
+                    self._responses.move_to_end(key)
+                    return self._responses[key]
+
+            if embedding is not None and self._matrix is not None and len(self._keys):
+                similarities = self._scores(embedding)
+
+                best_idx = int(similarities.argmax())
+                if similarities[best_idx] >= self._threshold:
+                    best_key = self._keys[best_idx]
+                    if self._expired(best_key):
+                        self._evict(best_key)
+                        return None
+                    self._responses.move_to_end(best_key)
+                    return self._responses[best_key]
+
+            return None
+
+    def put(
+        self,
+        question: str,
+        response: Any,
+        embedding: Optional[List[float]] = None,
+    ) -> None:
+        with self._lock:
+            expires_at = time.monotonic() + self._ttl
+
+            if embedding is not None and self._matrix is not None and len(self._keys):
+                # Near-duplicate of an existing entry: refresh it in place
+                # instead of growing the matrix
+                similarities = self._scores(embedding)
+                best_idx = int(similarities.argmax())
+                if similarities[best_idx] >= self._dedup_threshold:
+                    best_key = self._keys[best_idx]
+                    self._responses[best_key] = response
+                    self._responses.move_to_end(best_key)
+                    self._expires[best_key] = expires_at
+                    return
+
+            key = self.make_key(question)
+            self._responses[key] = response
+            self._responses.move_to_end(key)
+            self._expires[key] = expires_at
+
+            if embedding is not None and key not in self._keys:
+                row, scale = self._quantize(self._normalize(embedding))
+                self._keys.append(key)
+                if self._matrix is None:
+                    self._matrix = row[None, :]
+                    self._scales = np.array([scale], dtype=np.float32)
+                else:
+                    self._matrix = np.vstack([self._matrix, row[None, :]])
+                    self._scales = np.append(self._scales, np.float32(scale))
+
+            while len(self._responses) > self._max_size:
+                old_key, _ = self._responses.popitem(last=False)
+                self._expires.pop(old_key, None)
+                self._drop_embedding(old_key)
+
+    def _expired(self, key: str) -> bool:
+        return self._expires.get(key, float("inf")) < time.monotonic()
+
+    def _evict(self, key: str) -> None:
+        self._responses.pop(key, None)
+        self._expires.pop(key, None)
+        self._drop_embedding(key)
+
+    def _drop_embedding(self, key: str) -> None:
+        if key not in self._keys:
+            return
+        idx = self._keys.index(key)
+        del self._keys[idx]
+        self._matrix = np.delete(self._matrix, idx, axis=0)
+        self._scales = np.delete(self._scales, idx)
@@ -0,0 +1,36 @@
+import re
+
+# Chat filler that carries no retrieval intent; stripped before hashing
+# so "hi, can you explain X please" and "explain X" share a cache key
+_FILLER_PATTERN = re.compile(
+    r"\b("
+    r"please|thanks|thank you|hi|hello|hey|"
+    r"can you|could you|would you|will you|"
+    r"i want to know|tell me|kindly"
+    r")\b",
+    re.IGNORECASE,
+)
+
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def canonicalize(text: str) -> str:
+    """
+    Normalize a query down to its intent for cache keying.
+
+    Lowercases, drops greetings/politeness filler and punctuation, and
+    collapses whitespace. Used only for cache keys — the original text
+    is what goes into the RAG prompt.
+
+    Args:
+        text: Raw user query
+
+    Returns:
+        Canonical form of the query
+    """
+    cleaned = _FILLER_PATTERN.sub(" ", text.lower())
+    cleaned = _PUNCTUATION_PATTERN.sub(" ", cleaned)
+    cleaned = _WHITESPACE_PATTERN.sub(" ", cleaned).strip()
+    # Don't let an all-filler query collapse to an empty key
+    return cleaned or text.strip().lower()
@@ -1,3 +1,6 @@
+import asyncio
+import json
+import math
 from typing import List, Optional, Tuple
 from functools import lru_cache
 
@@ -10,6 +13,16 @@ from models.embedding_model import get_embedding_model
 
 
 class VectorStoreManager:
+
+    __slots__ = (
+        "api_key",
+        "index_name",
+        "_embedding_model",
+        "_pc",
+        "_index",
+        "_vector_store",
+    )
+
     def __init__(
         self,
         api_key: str | None = None,
@@ -30,37 +43,132 @@ class VectorStoreManager:
         
         # Initialize Pinecone client
         self._pc = Pinecone(api_key=self.api_key)
-        
+
+        # One Index handle for the manager's lifetime; building it per
+        # call re-reads config and rebuilds the HTTP client each time.
+        # pool_threads backs async_req upserts.
+        self._index = self._pc.Index(self.index_name, pool_threads=8)
+
         # Initialize vector store
         self._vector_store = PineconeVectorStore(
-            index=self._pc.Index(self.index_name),
+            index=self._index,
             embedding=self._embedding_model.get_langchain_embeddings(),
         )
     
+    def _upsert_with_embeddings(
+        self,
+        documents: List[Document],
+        embeddings: List[List[float]],
+        batch_size: int = 100,
+    ) -> List[str]:
+        """
+        Upsert documents with pre-computed embeddings directly to Pinecone.
+
+        Args:
+            documents: List of Document objects
+            embeddings: List of embedding vectors (must match len(documents))
+            batch_size: Batch size
+
+        Returns:
+            List of IDs
+        """
+        import secrets
+        import uuid
+
+        # async_req ships each batch on a client worker thread while
+        # the next batch is being built, so upsert RTTs overlap
+        # instead of serializing
+        index = self._index
+        all_ids = []
+        pending = []
+
+        for i in range(0, len(documents), batch_size):
+            batch_docs = documents[i:i + batch_size]
+            batch_embs = embeddings[i:i + batch_size]
+
+            # One urandom read per batch instead of a syscall per
+            # uuid4; the bytes are sliced into valid v4 UUIDs
+            rand = secrets.token_bytes(16 * len(batch_docs))
+            batch_ids = [
+                str(uuid.UUID(bytes=rand[j * 16:(j + 1) * 16], version=4))
+                for j in range(len(batch_docs))
+            ]
+
+            vectors = []
+
+            for doc_id, doc, emb in zip(batch_ids, batch_docs, batch_embs):
+                # Metadata must be simple types for Pinecone
+                metadata = doc.metadata.copy()
+                metadata["text"] = doc.page_content
+                # A list value indexes every entry and bloats the
+                # payload each query fetches; one compact JSON string
+                # is opaque to Pinecone and decoded on read
+                paths = metadata.get("image_paths")
+                if isinstance(paths, list):
+                    metadata["image_paths"] = json.dumps(
+                        paths, separators=(",", ":")
+                    )
+                vectors.append({
+                    "id": doc_id,
+                    # Callers may hand over numpy rows (e.g. fp16 image
+                    # embeddings); Pinecone's wire format wants floats
+                    "values": emb.tolist() if hasattr(emb, "tolist") else emb,
+                    "metadata": metadata
+                })
+
+            pending.append(index.upsert(vectors=vectors, async_req=True))
+            all_ids.extend(batch_ids)
+
+        # Surface any failure before reporting the IDs as stored
+        for result in pending:
+            result.get()
+
+        return all_ids
+
     def add_documents(
         self,
         documents: List[Document],
         batch_size: int = 100,
+        max_concurrency: int = 4,
     ) -> List[str]:
         """
         Add documents to the vector store.
-        
+
+        Small sets embed in one embed_documents call to amortize
+        per-request overhead. Larger sets are split into a few
+        contiguous slices embedded on a thread pool, so several HTTP
+        round trips to the embedding server are in flight at once.
+        Results are upserted in batches with the pre-computed vectors.
+
         Args:
             documents: List of LangChain Document objects
-            batch_size: Number of documents to add per batch
-            
+            batch_size: Number of documents to upsert per batch
+            max_concurrency: Upper bound on concurrent embedding calls
+
         Returns:
             List of document IDs
         """
-        all_ids = []
-        
-        # Process in batches
-        for i in range(0, len(documents), batch_size):
-            batch = documents[i:i + batch_size]
-            ids = self._vector_store.add_documents(batch)
-            all_ids.extend(ids)
-        
-        return all_ids
+        import math
+        from concurrent.futures import ThreadPoolExecutor
+
+        if not documents:
+            return []
+
+        texts = [doc.page_content for doc in documents]
+
+        slices = min(max_concurrency, math.ceil(len(texts) / batch_size))
+        if slices > 1:
+            step = math.ceil(len(texts) / slices)
+            parts = [texts[i:i + step] for i in range(0, len(texts), step)]
+            with ThreadPoolExecutor(max_workers=len(parts)) as pool:
+                part_results = list(
+                    pool.map(self._embedding_model.embed_documents, parts)
+                )
+            embeddings = [emb for part in part_results for emb in part]
+        else:
+            embeddings = self._embedding_model.embed_documents(texts)
+
+        return self._upsert_with_embeddings(documents, embeddings, batch_size)
 
     def add_image_documents(
         self,
@@ -71,43 +179,16 @@ class VectorStoreManager:
         """
         Add documents with pre-computed embeddings (for Images) directly to Pinecone.
         Bypasses the default text embedding model.
-        
+
         Args:
             documents: List of Document objects
             embeddings: List of embedding vectors (must match len(documents))
             batch_size: Batch size
-            
+
         Returns:
             List of IDs
         """
-        import uuid
-        
-        index = self._pc.Index(self.index_name)
-        all_ids = []
-        
-        for i in range(0, len(documents), batch_size):
-            batch_docs = documents[i:i + batch_size]
-            batch_embs = embeddings[i:i + batch_size]
-            
-            vectors = []
-            batch_ids = []
-            
-            for doc, emb in zip(batch_docs, batch_embs):
-                doc_id = str(uuid.uuid4())
-                batch_ids.append(doc_id)
-                
-                # Metadata must be simple types for Pinecone
-                metadata = doc.metadata.copy()
-                metadata["text"] = doc.page_content 
-                vectors.append({
-                    "id": doc_id, 
-                    "values": emb, 
-                    "metadata": metadata
-                })
-            
-            index.upsert(vectors=vectors)
-            all_ids.extend(batch_ids)
-            
+        all_ids = self._upsert_with_embeddings(documents, embeddings, batch_size)
         print(f"Upserted {len(all_ids)} image vectors directly.")
         return all_ids
     
@@ -115,30 +196,149 @@ class VectorStoreManager:
         self,
         query: str,
         k: int = 5,
+        filter: Optional[dict] = None,
+        embedding: Optional[List[float]] = None,
     ) -> List[Tuple[Document, float]]:
         """
         Search for similar documents with similarity scores.
-        
+
+        Pinecone serves this from an ANN index, so recall cost does not
+        grow linearly with corpus size; metadata filters are applied
+        index-side rather than by post-filtering results in Python.
+
         Args:
             query: Query text
             k: Number of results to return
             filter: Optional metadata filter
-            
+            embedding: Optional precomputed query embedding; skips the
+                embedding call when the caller already has it
+
         Returns:
             List of (document, score) tuples
         """
 
         print(f"doing similairty search with score: query='{query}' k={k}")
-        return self._vector_store.similarity_search_with_score(
-            query=query,
+        if embedding is not None:
+            results = self._vector_store.similarity_search_by_vector_with_score(
+                embedding,
+                k=k,
+                filter=filter,
+            )
+        else:
+            results = self._vector_store.similarity_search_with_score(
+                query=query,
+                k=k,
+                filter=filter,
+            )
+        for doc, _ in results:
+            self._decode_image_paths(doc.metadata)
+        return results
+
+    @staticmethod
+    def _decode_image_paths(metadata: dict) -> None:
+        """Expand the JSON-encoded image_paths string stored in Pinecone
+        back into the list consumers expect."""
+        paths = metadata.get("image_paths")
+        if isinstance(paths, str):
+            try:
+                metadata["image_paths"] = json.loads(paths)
+            except ValueError:
+                pass
+
+    def similarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        filter: Optional[dict] = None,
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Run many searches as a two-stage pipeline.
+
+        Embedding and retrieval are independent remote calls, so a
+        dedicated embed pool works ahead while the query pool has
+        earlier vectors in flight to Pinecone — query N+1 embeds while
+        query N retrieves. Useful for evaluation runs; single queries
+        should keep using similarity_search_with_score.
+
+        Args:
+            queries: Query texts
+            k: Number of results per query
+            filter: Optional metadata filter applied to every query
+
+        Returns:
+            One (document, score) list per query, in input order
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        results: List[List[Tuple[Document, float]]] = [[] for _ in queries]
+
+        with ThreadPoolExecutor(max_workers=2) as embed_pool, \
+                ThreadPoolExecutor(max_workers=4) as query_pool:
+            embed_futures = [
+                embed_pool.submit(self._embedding_model.embed_query, query)
+                for query in queries
+            ]
+            query_futures = []
+            for idx, embed_future in enumerate(embed_futures):
+                query_futures.append(query_pool.submit(
+                    self.similarity_search_with_score,
+                    queries[idx],
+                    k=k,
+                    filter=filter,
+                    embedding=embed_future.result(),
+                ))
+            for idx, query_future in enumerate(query_futures):
+                results[idx] = query_future.result()
+
+        return results
+
+    async def asimilarity_search_with_score(
+        self,
+        query: str,
+        k: int = 5,
+        filter: Optional[dict] = None,
+        embedding: Optional[List[float]] = None,
+    ) -> List[Tuple[Document, float]]:
+        """
+        Async variant of similarity_search_with_score.
+
+        The Pinecone REST client is blocking, so the round trip runs in
+        a worker thread; the event loop stays free for other requests
+        while this one waits on the network.
+        """
+        return await asyncio.to_thread(
+            self.similarity_search_with_score,
+            query,
             k=k,
+            filter=filter,
+            embedding=embedding,
         )
-    
+
+    async def amultimodal_search(
+        self,
+        text_query: str | None = None,
+        image_query_path: str | None = None,
+        k: int = 5,
+        filter: Optional[dict] = None,
+        text_embedding: Optional[List[float]] = None,
+    ) -> List[Tuple[Document, float]]:
+        """Async variant of multimodal_search (runs in a worker thread)."""
+        return await asyncio.to_thread(
+            self.multimodal_search,
+            text_query=text_query,
+            image_query_path=image_query_path,
+            k=k,
+            filter=filter,
+            text_embedding=text_embedding,
+        )
+
     def multimodal_search(
         self,
         text_query: str | None = None,
         image_query_path: str | None = None,
         k: int = 5,
+        filter: Optional[dict] = None,
+        text_embedding: Optional[List[float]] = None,
     ) -> List[Tuple[Document, float]]:
         """
         Perform multimodal retrieval.
@@ -155,53 +355,90 @@ class VectorStoreManager:
             List of (Document, score)
         """
         import numpy as np
-        
+
+        # Normalization and fusion stay in float32 numpy end-to-end;
+        # the single .tolist() happens right before the Pinecone call
+        # instead of converting back and forth per step. Norms come
+        # from np.vdot + math.sqrt: vdot skips linalg.norm's dispatch
+        # and validation layers, and math.sqrt on a Python float beats
+        # np.sqrt on a 0-d array.
+        def _unit(vec):
+            return vec / max(math.sqrt(float(np.vdot(vec, vec))), 1e-12)
+
         text_emb = None
-        if text_query:
-            text_emb = self._embedding_model.embed_query(text_query)
-            norm = np.linalg.norm(text_emb)
-            if norm > 0:
-                text_emb = (np.array(text_emb) / norm).tolist()
-                
         image_emb = None
-        if image_query_path:
+
+        if text_query and image_query_path and text_embedding is None:
+            # Both embeddings are needed and neither is precomputed:
+            # the Ollama round trip and the CLIP forward are independent
+            # and mostly release the GIL, so run the text embed on a
+            # worker while CLIP runs here — cost drops from t_text +
+            # t_image to max of the two
+            from concurrent.futures import ThreadPoolExecutor
             from models.clip_model import get_clip_model
             clip = get_clip_model()
-            image_emb = clip.get_image_embedding(image_query_path)
-            norm = np.linalg.norm(image_emb)
-            if norm > 0:
-                image_emb = (np.array(image_emb) / norm).tolist()
-                
-        final_vec = []
-        if text_emb and image_emb:
-            fused = (np.array(text_emb) + np.array(image_emb)) / 2.0
-            norm = np.linalg.norm(fused)
-            if norm > 0:
-                final_vec = (fused / norm).tolist()
-            else:
-                final_vec = fused.tolist()
-                
-        elif text_emb:
-            final_vec = text_emb
-        elif image_emb:
-            final_vec = image_emb
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                text_future = pool.submit(
+                    self._embedding_model.embed_query, text_query
+                )
+                image_raw = clip.get_image_embedding(image_query_path)
+                text_raw = text_future.result()
+            text_emb = _unit(np.asarray(text_raw, dtype=np.float32))
+            image_emb = np.asarray(image_raw, dtype=np.float32)
+        else:
+            if text_query:
+                text_emb = np.asarray(
+                    text_embedding or self._embedding_model.embed_query(text_query),
+                    dtype=np.float32,
+                )
+                text_emb = _unit(text_emb)
+
+            if image_query_path:
+                from models.clip_model import get_clip_model
+                clip = get_clip_model()
+                # CLIPModelWrapper normalizes at the model boundary, so
+                # the embedding is already unit-length; renormalizing
+                # here would just repeat the reduction and sqrt
+                image_emb = np.asarray(
+                    clip.get_image_embedding(image_query_path), dtype=np.float32
+                )
+
+        # The embedders signal failure with an empty list (CLIP returns
+        # [] on a bad image), which arrives here as an empty array, not
+        # None; treat it as a missing modality so a corrupt query image
+        # degrades to text-only search instead of a broadcast error
+        if text_emb is not None and text_emb.size == 0:
+            text_emb = None
+        if image_emb is not None and image_emb.size == 0:
+            image_emb = None
+
+        if text_emb is not None and image_emb is not None:
+            fused = _unit(text_emb + image_emb)
+            final_vec = fused.tolist()
+        elif text_emb is not None:
+            final_vec = text_emb.tolist()
+        elif image_emb is not None:
+            final_vec = image_emb.tolist()
         else:
-            return [] 
+            return []
             
         print(f"Multimodal Search: Text='{text_query}' Image='{image_query_path}'")
         
         try:
-            index = self._pc.Index(self.index_name)
-            results = index.query(
+            results = self._index.query(
                 vector=final_vec,
                 top_k=k,
-                include_metadata=True
+                filter=filter,
+                include_metadata=True,
+                # Don't ship the stored vectors back; metadata is enough
+                include_values=False,
             )
             
             docs = []
             for match in results.matches:
                 metadata = match.metadata or {}
-                content = metadata.pop("text", "") 
+                content = metadata.pop("text", "")
+                self._decode_image_paths(metadata)
                 doc = Document(page_content=content, metadata=metadata)
                 docs.append((doc, match.score))
                 